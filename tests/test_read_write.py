@@ -10,6 +10,47 @@ class TestReadWrite(unittest.TestCase):
         self.check_for_file('bigtest.nbt')
         self.check_for_file('bigtest2.nbt')
         self.check_for_tag(nbt.TagList(nbt.TagString, [nbt.TagString('Non-compound root tag')]), '')
+        self.check_for_tag(nbt.TagList(nbt.TagInt, [nbt.TagInt(i * 7919 - 2**31) for i in range(100)]), 'ints')
+
+
+    def test_compresslevel(self):
+        tag = nbt.read_nbt_file(BytesIO(read_test_data('bigtest.nbt')))
+        for level in (0, 1, 9):
+            mock_file = BytesIO()
+            nbt.write_nbt_file(mock_file, tag, compresslevel=level)
+            mock_file.seek(0)
+            self.assertEqual(nbt.read_nbt_file(mock_file), tag)
+
+
+    def test_deeply_nested(self):
+        depth = 5000
+        data = b'\x0a\x00\x01a' * depth + b'\x00' * (depth + 1)
+        root = nbt.TagCompound.from_bytes(data)
+        self.assertEqual(root.to_bytes(), data)
+
+        tag = root
+        for _ in range(depth):
+            tag = tag['a']
+        self.assertEqual(tag, nbt.TagCompound())
+
+
+    def test_truncated_array(self):
+        # Huge length prefix with no data must fail without allocating it
+        with self.assertRaises(nbt.NbtUnpackError):
+            nbt.TagLongArray.from_bytes(b'\x7f\xff\xff\xff')
+        with self.assertRaises(nbt.NbtUnpackError):
+            nbt.TagIntArray.from_bytes(b'\x00\x00\x00\x02\x00\x00\x00\x01')
+
+
+    def test_truncated_nested_list(self):
+        # Nested list items are created as they're read, not from the count
+        for itemid in (b'\x09', b'\x0a'):
+            with self.assertRaises(IndexError):
+                nbt.TagList.from_bytes(itemid + b'\x7f\xff\xff\xff')
+        with self.assertRaises(IndexError):
+            nbt.TagList.from_bytes(b'\x0a\x00\x00\x00\x02\x00')
+        tag = nbt.TagList.from_bytes(b'\x0a\x00\x00\x00\x02\x00\x00')
+        self.assertEqual(tag, nbt.TagList(nbt.TagCompound, [nbt.TagCompound(), nbt.TagCompound()]))
 
 
     def check_for_file(self, filename):
@@ -22,6 +22,15 @@ class TestSnbt(unittest.TestCase):
         self.assertEqual(tag, parsed)
 
 
+    def test_serialize_escapes(self):
+        self.run_cycle_for_tag(nbt.TagString('quotes " and \' and \\ backslash'))
+        self.assertEqual(nbt.to_snbt(nbt.TagString('a"b')), r'"a\"b"')
+        self.run_cycle_for_tag(nbt.TagString('\\'))
+        self.run_cycle_for_tag(nbt.TagString('ends with \\\\'))
+        self.run_cycle_for_tag(nbt.TagString('a\nb'))
+        self.assertEqual(nbt.parse_snbt("'multi\nline'"), nbt.TagString('multi\nline'))
+
+
     def test_parseable(self):
         self.assertEqual(
             nbt.parse_snbt('123b'),
@@ -130,6 +139,7 @@ class TestSnbt(unittest.TestCase):
 
         self.parse_expect_fail(r'"unclosed string')
         self.parse_expect_fail(r'"bad quote\"')
+        self.parse_expect_fail(r'"')
         
         self.parse_expect_fail(r'[[],[]')
         self.parse_expect_fail(r'[1,2,]')
@@ -1,3 +1,4 @@
+from array import array
 import unittest
 from .utils import round_f32
 import uNBT as nbt
@@ -10,6 +11,9 @@ class TestTagCreation(unittest.TestCase):
         self.assertEqual(tag_cls(x + 5 * mod).value, x)
         self.assertEqual(tag_cls(-x).value, -x)
         self.assertEqual(tag_cls(-x + 8 * mod).value, -x)
+        self.assertEqual(tag_cls(mod // 2 - 1).value, mod // 2 - 1)
+        self.assertEqual(tag_cls(mod // 2).value, -mod // 2)
+        self.assertEqual(tag_cls(mod - 1).value, -1)
 
         with self.assertRaises(ValueError):
             tag_cls(str(x))
@@ -54,6 +58,16 @@ class TestTagCreation(unittest.TestCase):
         a = [i * 2**56 for i in range(-128, 128)]
         self.assertEqual(list(nbt.TagLongArray(a)), a)
 
+    def test_tag_array_from_array(self):
+        a = array('i', [1, -2, 3])
+        tag = nbt.TagIntArray.from_array(a)
+        self.assertIs(tag.value, a)
+
+        b = array('b', [1, -2, 3])
+        tag = nbt.TagIntArray.from_array(b)
+        self.assertIsNot(tag.value, b)
+        self.assertEqual(list(tag), list(b))
+
 
     def test_tag_string(self):
         self.assertEqual(nbt.TagString().value, '')
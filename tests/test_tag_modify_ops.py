@@ -57,6 +57,18 @@ class TestTagModifyOperations(unittest.TestCase):
         self.set_list_test(nbt.TagLongArray(), a)
 
 
+    def test_tag_array_methods(self):
+        tag = nbt.TagIntArray([1, 2, 1])
+        tag.extend(array('b', [3]))
+        tag.extend([4])
+        self.assertEqual(list(tag), [1, 2, 1, 3, 4])
+        self.assertEqual(tag.index(1), 0)
+        self.assertEqual(tag.index(1, 1), 2)
+        self.assertEqual(tag.index(1, -3), 2)
+        with self.assertRaises(ValueError):
+            tag.index(2, 0, 1)
+
+
     def test_tag_string(self):
         self.set_test(nbt.TagString('-'), 'Hello, tests!')
 
@@ -90,6 +102,35 @@ class TestTagModifyOperations(unittest.TestCase):
         tag.append(x)
         self.assertEqual(tag[-1], x)
 
+        tag.extend(b)
+        self.assertSequenceEqual(tag[-2:], b)
+        with self.assertRaises(nbt.NbtInvalidOperation):
+            tag.extend([nbt.TagInt(5), nbt.TagString('not TagInt')])
+        self.assertIs(tag.pop(), b[-1])
+        tag.clear()
+        self.assertEqual(len(tag), 0)
+
+        # Subclass items are accepted by index and slice assignment alike,
+        # but not by append, insert and extend
+        class SubInt(nbt.TagInt):
+            __slots__ = ()
+        tag = nbt.TagList(nbt.TagInt, [nbt.TagInt(1), nbt.TagInt(2)])
+        tag[0] = SubInt(3)
+        tag[1:] = [SubInt(4)]
+        self.assertEqual([t.value for t in tag], [3, 4])
+        self.assertIs(tag.item_cls, nbt.TagInt)
+        with self.assertRaises(nbt.NbtInvalidOperation):
+            tag.append(SubInt(5))
+        with self.assertRaises(nbt.NbtInvalidOperation):
+            tag.extend([nbt.TagInt(5), SubInt(6)])
+        self.assertEqual(len(tag), 2)
+
+        tag = nbt.TagList(nbt.Tag)
+        tag.extend([nbt.TagInt(1), nbt.TagInt(2)])
+        self.assertIs(tag.item_cls, nbt.TagInt)
+        with self.assertRaises(nbt.NbtInvalidOperation):
+            nbt.TagList(nbt.Tag).extend(['not a tag'])
+
         tag = nbt.TagList(nbt.Tag)
         x = nbt.TagString('marker')
         tag.append(x)
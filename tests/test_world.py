@@ -0,0 +1,131 @@
+import unittest
+import struct
+import zlib
+import tempfile
+from pathlib import Path
+from io import BytesIO
+import uNBT as nbt
+
+
+def write_region(path, chunks, root_name=''):
+    # Minimal region file: location table, empty timestamps, zlib chunk bodies
+    header = bytearray(8192)
+    body = bytearray()
+    sector = 2
+    for (x, z), tag in chunks.items():
+        raw = BytesIO()
+        nbt.write_nbt_file(raw, tag, root_name=root_name, compress=False)
+        data = zlib.compress(raw.getvalue())
+        payload = struct.pack('>IB', len(data) + 1, 2) + data
+        sectors = (len(payload) + 4095) // 4096
+        payload += bytes(sectors * 4096 - len(payload))
+        struct.pack_into('>I', header, 4 * (x + 32 * z), (sector << 8) | sectors)
+        body += payload
+        sector += sectors
+    Path(path).write_bytes(bytes(header) + bytes(body))
+
+
+def chunk_tag(x, z):
+    return nbt.TagCompound({'xPos': nbt.TagInt(x), 'zPos': nbt.TagInt(z)})
+
+
+class TestRegion(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / 'r.0.0.mca'
+        write_region(self.path, {(x, 0): chunk_tag(x, 0) for x in range(4)})
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+
+    def test_read_chunks(self):
+        region = nbt.Region.from_file(str(self.path))
+        self.assertIsNone(region.get_chunk(0, 1))
+        for x in range(4):
+            self.assertEqual(region.get_chunk(x, 0).nbt, chunk_tag(x, 0))
+        self.assertEqual(len(list(region.iter_nonempty())), 4)
+        self.assertIs(region.get_chunk(1, 0), region.get_chunk(1, 0))
+
+
+    def test_out_of_region(self):
+        region = nbt.Region.from_file(str(self.path))
+        for x, z in ((32, 0), (-32, 2), (0, -1), (0, 32)):
+            with self.assertRaises(IndexError):
+                region.get_chunk(x, z)
+            with self.assertRaises(IndexError):
+                region.has_chunk(x, z)
+            with self.assertRaises(IndexError):
+                region.get_chunk_data(x, z)
+
+
+    def test_bounded_cache(self):
+        region = nbt.Region.from_file(str(self.path), cache_size=2)
+        a = region.get_chunk(0, 0)
+        b = region.get_chunk(1, 0)
+        self.assertIs(region.get_chunk(0, 0), a)
+
+        # Chunk 1 is least recently used and gets dropped
+        region.get_chunk(2, 0)
+        self.assertIs(region.get_chunk(0, 0), a)
+        b2 = region.get_chunk(1, 0)
+        self.assertIsNot(b2, b)
+        self.assertEqual(b2.nbt, chunk_tag(1, 0))
+
+        # Changes to a dropped chunk are lost
+        a.nbt['xPos'] = nbt.TagInt(999)
+        region.get_chunk(2, 0)
+        self.assertEqual(region.get_chunk(0, 0).nbt, chunk_tag(0, 0))
+
+
+    def test_decompress_all(self):
+        region = nbt.Region.from_file(str(self.path))
+        region.decompress_all(max_workers=1)
+        chunks = [region.get_chunk(x, 0) for x in range(4)]
+        self.assertEqual([chunk.nbt for chunk in chunks], [chunk_tag(x, 0) for x in range(4)])
+        self.assertEqual(list(region.iter_nonempty()), chunks)
+
+        # Parsed chunks fit in the cache and are returned as is
+        region = nbt.Region.from_file(str(self.path), cache_size=2)
+        region.decompress_all(max_workers=1)
+        a = region.get_chunk(0, 0)
+        b = region.get_chunk(1, 0)
+        self.assertIs(region.get_chunk(0, 0), a)
+        self.assertIs(region.get_chunk(1, 0), b)
+        self.assertEqual([chunk.nbt for chunk in region.iter_nonempty()], [chunk_tag(x, 0) for x in range(4)])
+
+
+    def test_decompress_all_workers(self):
+        path = Path(self.tmp_dir.name) / 'r.0.1.mca'
+        coords = [(x, z) for z in range(3) for x in range(32)]
+        write_region(path, {xz: chunk_tag(*xz) for xz in coords})
+        region = nbt.Region.from_file(str(path))
+        region.decompress_all(max_workers=2)
+        chunks = list(region.iter_nonempty())
+        self.assertEqual([chunk.nbt for chunk in chunks], [chunk_tag(*xz) for xz in coords])
+        for (x, z), chunk in zip(coords, chunks):
+            self.assertIs(region.get_chunk(x, z), chunk)
+
+
+    def test_get_chunk_data(self):
+        path = Path(self.tmp_dir.name) / 'r.1.0.mca'
+        write_region(path, {(0, 0): chunk_tag(0, 0), (1, 0): chunk_tag(1, 0)}, root_name='root')
+        expected = BytesIO()
+        nbt.write_nbt_file(expected, chunk_tag(0, 0), root_name='root', compress=False)
+        expected = expected.getvalue()
+
+        for cache_size in (None, 1):
+            region = nbt.Region.from_file(str(path), cache_size=cache_size)
+            self.assertTrue(region.has_chunk(0, 0))
+            self.assertFalse(region.has_chunk(5, 5))
+            self.assertIsNone(region.get_chunk_data(5, 5))
+            self.assertEqual(region.get_chunk_data(0, 0), expected)
+
+            # Parsed chunk is written back with its changes and root name
+            chunk = region.get_chunk(0, 0)
+            self.assertEqual(chunk.name, 'root')
+            self.assertEqual(region.get_chunk_data(0, 0), expected)
+            chunk.nbt['xPos'] = nbt.TagInt(999)
+            tag, name = nbt.read_nbt_file(BytesIO(region.get_chunk_data(0, 0)), with_name=True)
+            self.assertEqual(name, 'root')
+            self.assertEqual(tag['xPos'], nbt.TagInt(999))
@@ -1,6 +1,9 @@
 from pathlib import PurePath
 import struct
+import sys
 import gzip
+from functools import lru_cache
+from itertools import repeat
 from array import array
 from collections.abc import MutableSequence, MutableMapping
 from io import BytesIO
@@ -27,27 +30,59 @@ __all__ = [
 ]
 
 
-_struct_byte = struct.Struct('>b')
+_struct_tagid = struct.Struct('>B')
 _struct_short = struct.Struct('>h')
 _struct_int = struct.Struct('>i')
 _struct_float = struct.Struct('>f')
+# Tag id followed by name length or item count
+_struct_entry_header = struct.Struct('>Bh')
+_struct_list_header = struct.Struct('>Bi')
+
+# Pre-bound methods for hot read/write paths
+_unpack_short = _struct_short.unpack
+_unpack_int = _struct_int.unpack
+_pack_tagid = _struct_tagid.pack
+_pack_short = _struct_short.pack
+_pack_int = _struct_int.pack
+_pack_float = _struct_float.pack
+_unpack_float = _struct_float.unpack
+_pack_entry_header = _struct_entry_header.pack
+_pack_list_header = _struct_list_header.pack
 
 
 def _compound_read_name(stream):
-	size, = _struct_short.unpack(stream.read(2))
-	return stream.read(size).decode('utf-8')
+	size, = _unpack_short(stream.read(2))
+	# Same key names repeat across many compounds, share one string object.
+	# decode() defaults to UTF-8 and skips the codec name lookup, its
+	# decoder already has an ASCII fast path.
+	return sys.intern(stream.read(size).decode())
 
 
 def _compound_write_name(stream, name):
-	raw = name.encode('utf-8')
-	stream.write(_struct_short.pack(len(raw)))
+	raw = name.encode()
+	stream.write(_pack_short(len(raw)))
 	stream.write(raw)
 
 
+# Signed value of every unsigned byte, avoids modulo arithmetic in reads.
+# Tags are mutable, so values are shared instead of tag instances.
+_signed_byte_values = tuple(range(128)) + tuple(range(-128, 0))
+
+
 def _array_exact_for(itype):
 	return array(itype).itemsize == struct.calcsize(itype)
 
 
+@lru_cache(maxsize=64)
+def _array_struct(itype, length):
+	return struct.Struct('>{}{}'.format(length, itype))
+
+
+def _array_needs_byteswap(itype):
+	# Array buffers use native byte order, NBT is big-endian
+	return sys.byteorder == 'little' and array(itype).itemsize > 1
+
+
 class NbtError(Exception):
 	"""Some error occurred during operations with NBT tags."""
 
@@ -97,6 +132,18 @@ class Tag:
 		"""
 		raise NotImplementedError('Cannot read instances of base Tag')
 	
+	@classmethod
+	def _read_many(cls, stream, count):
+		# Read `count` consecutive tags, used for list items
+		tag_read = cls.read
+		return [tag_read(stream) for _ in range(count)]
+	
+	@classmethod
+	def _write_many(cls, stream, tags):
+		# Write consecutive tags of this class, used for list items
+		for tag in tags:
+			tag.write(stream)
+	
 	def write(self, stream):
 		"""Write this tag to a provided stream.
 
@@ -148,12 +195,9 @@ class _TagNumber(Tag):
 		"""
 		if not isinstance(value, int):
 			raise ValueError('Tag value must be an int')
-		mod = self._mod
-		value = int(value) % mod
-		if value < (mod >> 1):
-			self._value = value
-		else:
-			self._value = value - mod
+		# Branchless wrap to two's complement range
+		sign = self._sign
+		self._value = ((value + sign) & self._mask) - sign
 	
 	@property
 	def value(self):
@@ -173,9 +217,34 @@ class _TagNumber(Tag):
 	
 	@classmethod
 	def read(cls, stream):
-		fmt = cls._fmt
-		x, = fmt.unpack(stream.read(fmt.size))
-		return cls(x)
+		# Unpacked values are always in range, no need to normalize
+		tag = cls.__new__(cls)
+		tag._value, = cls._fmt.unpack(stream.read(cls._size))
+		return tag
+	
+	@classmethod
+	def _read_many(cls, stream, count):
+		# Unpack all list items at once
+		if count <= 0:
+			return []
+		fmt = _array_struct(cls._fmt.format[1:], count)
+		new = cls.__new__
+		tags = []
+		for value in fmt.unpack(stream.read(fmt.size)):
+			tag = new(cls)
+			tag._value = value
+			tags.append(tag)
+		return tags
+	
+	@classmethod
+	def _write_many(cls, stream, tags):
+		# Pack all list items at once, unless the list is too short to pay off
+		if len(tags) < 8:
+			for tag in tags:
+				tag.write(stream)
+		else:
+			fmt = _array_struct(cls._fmt.format[1:], len(tags))
+			stream.write(fmt.pack(*[tag._value for tag in tags]))
 	
 	def write(self, stream):
 		stream.write(self._fmt.pack(self._value))
@@ -184,35 +253,50 @@ class _TagNumber(Tag):
 class TagByte(_TagNumber):
 	__slots__ = ()
 	tagid = 1
-	_mod = 2 ** 8
+	_mask = 2 ** 8 - 1
+	_sign = 2 ** 7
 	_fmt = struct.Struct('>b')
+	_size = 1
+
+	@classmethod
+	def read(cls, stream):
+		tag = cls.__new__(cls)
+		tag._value = _signed_byte_values[stream.read(1)[0]]
+		return tag
 
 
 class TagShort(_TagNumber):
 	__slots__ = ()
 	tagid = 2
-	_mod = 2 ** 16
+	_mask = 2 ** 16 - 1
+	_sign = 2 ** 15
 	_fmt = struct.Struct('>h')
+	_size = 2
 
 
 class TagInt(_TagNumber):
 	__slots__ = ()
 	tagid = 3
-	_mod = 2 ** 32
+	_mask = 2 ** 32 - 1
+	_sign = 2 ** 31
 	_fmt = struct.Struct('>i')
+	_size = 4
 
 
 class TagLong(_TagNumber):
 	__slots__ = ()
 	tagid = 4
-	_mod = 2 ** 64
+	_mask = 2 ** 64 - 1
+	_sign = 2 ** 63
 	_fmt = struct.Struct('>q')
+	_size = 8
 
 
 class TagDouble(_TagNumber):
 	__slots__ = ()
 	tagid = 6
 	_fmt = struct.Struct('>d')
+	_size = 8
 	
 	def __init__(self, value=0.0):
 		"""Initialize new floating point number tag.
@@ -228,6 +312,7 @@ class TagFloat(_TagNumber):
 	__slots__ = ()
 	tagid = 5
 	_fmt = struct.Struct('>f')
+	_size = 4
 
 	def __init__(self, value=0.0):
 		"""Initialize new floating point number tag.
@@ -240,7 +325,7 @@ class TagFloat(_TagNumber):
 		"""
 		if not isinstance(value, float):
 			raise ValueError('Tag value must be a float')
-		self._value, = _struct_float.unpack(_struct_float.pack(value))
+		self._value, = _unpack_float(_pack_float(value))
 
 
 class _TagNumberArray(Tag, MutableSequence):
@@ -257,9 +342,34 @@ class _TagNumberArray(Tag, MutableSequence):
 		else:
 			self._value = array(self._itype)
 	
+	@classmethod
+	def from_array(cls, values):
+		"""Create new number array tag backed by an existing array.
+
+		Note:
+			`values` is used without copying if it has this tag's typecode,
+			so later changes to it are visible through the tag.
+
+		Args:
+			values (array): Array of numbers to use as tag value.
+
+		Returns:
+			Tag: New tag holding `values`.
+		"""
+		if not isinstance(values, array) or values.typecode != cls._itype:
+			return cls(values)
+		tag = cls.__new__(cls)
+		tag._value = values
+		return tag
+
 	@property
 	def value(self):
-		"""Get internal array buffer"""
+		"""Get internal array buffer
+
+		Note:
+			Array supports the buffer protocol, so it can be wrapped without
+			copying, e.g. with ``numpy.frombuffer(tag.value, dtype=...)``.
+		"""
 		return self._value
 
 	def __str__(self):
@@ -271,6 +381,15 @@ class _TagNumberArray(Tag, MutableSequence):
 	def __getitem__(self, index):
 		return self._value[index]
 	
+	def __iter__(self):
+		return iter(self._value)
+	
+	def __reversed__(self):
+		return reversed(self._value)
+	
+	def __contains__(self, value):
+		return value in self._value
+	
 	def __setitem__(self, index, value):
 		self._value[index] = value
 	
@@ -280,56 +399,99 @@ class _TagNumberArray(Tag, MutableSequence):
 	def insert(self, index, value):
 		self._value.insert(index, value)
 	
-	@classmethod
+	# Direct array methods in place of slower MutableSequence mixins
+	def append(self, value):
+		self._value.append(value)
+	
+	def extend(self, values):
+		# array.extend only takes arrays of the same typecode directly
+		if isinstance(values, array) and values.typecode != self._value.typecode:
+			values = iter(values)
+		self._value.extend(values)
+	
+	def pop(self, index=-1):
+		return self._value.pop(index)
+	
+	def remove(self, value):
+		self._value.remove(value)
+	
+	def clear(self):
+		del self._value[:]
+	
+	def index(self, value, *args):
+		# array.index takes start and stop only since Python 3.10
+		if args:
+			return MutableSequence.index(self, value, *args)
+		return self._value.index(value)
+	
+	def count(self, value):
+		return self._value.count(value)
+	
+	# Fallbacks for platforms where array items don't match NBT sizes.
+	# Not a classmethod here so subclasses can wrap it with their own cls.
 	def _read_s(cls, stream):
-		length, = _struct_int.unpack(stream.read(4))
-		fmt = struct.Struct('>{}{}'.format(length, cls._itype))
+		length, = _unpack_int(stream.read(4))
+		fmt = _array_struct(cls._itype, length)
 		return cls(fmt.unpack(stream.read(fmt.size)))
 	
 	def _write_s(self, stream):
 		length = len(self._value)
-		fmt = struct.Struct('>{}{}'.format(length, self._itype))
-		stream.write(_struct_int.pack(length))
+		fmt = _array_struct(self._itype, length)
+		stream.write(_pack_int(length))
 		stream.write(fmt.pack(*self._value))
 	
 	@classmethod
 	def read(cls, stream):
-		length, = _struct_int.unpack(stream.read(4))
-		tag = cls()
-		values = tag._value
-		values.fromfile(stream, length)
-		values.byteswap()
+		length, = _unpack_int(stream.read(4))
+		values = array(cls._itype)
+		# Array is built only from data actually read, so a corrupt length
+		# isn't allocated up front here (in-memory streams like BytesIO
+		# also return just the bytes they hold)
+		data = stream.read(length * values.itemsize)
+		if len(data) != length * values.itemsize:
+			raise NbtUnpackError('Unexpected end of array data')
+		values.frombytes(data)
+		if cls._byteswap:
+			values.byteswap()
+		tag = cls.__new__(cls)
+		tag._value = values
 		return tag
 
 	def write(self, stream):
-		stream.write(_struct_int.pack(len(self._value)))
-		out = array(self._itype, self._value)
-		out.byteswap()
-		out.tofile(stream)
+		values = self._value
+		stream.write(_pack_int(len(values)))
+		if self._byteswap:
+			values = array(self._itype, values)
+			values.byteswap()
+		# Arrays are bytes-like, write the buffer without a tobytes() copy
+		stream.write(values)
 
 
 class TagByteArray(_TagNumberArray):
 	__slots__ = ()
 	tagid = 7
 	_itype = 'b'
+	_byteswap = _array_needs_byteswap(_itype)
 	if not _array_exact_for(_itype):
-		read, write = _TagNumberArray._read_s, _TagNumberArray._write_s
+		read, write = classmethod(_TagNumberArray._read_s), _TagNumberArray._write_s
 
 
 class TagIntArray(_TagNumberArray):
 	__slots__ = ()
 	tagid = 11
 	_itype = 'i'
+	_byteswap = _array_needs_byteswap(_itype)
 	if not _array_exact_for(_itype):
-		read, write = _TagNumberArray._read_s, _TagNumberArray._write_s
+		read, write = classmethod(_TagNumberArray._read_s), _TagNumberArray._write_s
 
 
 class TagLongArray(_TagNumberArray):
 	__slots__ = ()
 	tagid = 12
 	_itype = 'q'
+	_byteswap = _array_needs_byteswap(_itype)
 	if not _array_exact_for(_itype):
-		read, write = _TagNumberArray._read_s, _TagNumberArray._write_s
+		read, write = classmethod(_TagNumberArray._read_s), _TagNumberArray._write_s
 
 
 class TagString(Tag):
@@ -361,12 +523,14 @@ class TagString(Tag):
 	
 	@classmethod
 	def read(cls, stream):
-		size, = _struct_short.unpack(stream.read(2))
-		return cls(stream.read(size).decode('utf-8'))
+		size, = _unpack_short(stream.read(2))
+		tag = cls.__new__(cls)
+		tag._value = stream.read(size).decode()
+		return tag
 
 	def write(self, stream):
-		raw = self._value.encode('utf-8')
-		stream.write(_struct_short.pack(len(raw)))
+		raw = self._value.encode()
+		stream.write(_pack_short(len(raw)))
 		stream.write(raw)
 
 
@@ -390,7 +554,8 @@ class TagList(Tag, MutableSequence):
 		self.item_cls = item_cls
 		if items is not None:
 			items = list(items)
-			if not all(type(item) is item_cls for item in items):
+			# Exact type match for every item, checked at C level
+			if not set(map(type, items)) <= {item_cls}:
 				raise NbtInvalidOperation('All list elements must be same Tag')
 			self._value = items
 		else:
@@ -407,6 +572,15 @@ class TagList(Tag, MutableSequence):
 	def __getitem__(self, index):
 		return self._value[index]
 	
+	def __iter__(self):
+		return iter(self._value)
+	
+	def __reversed__(self):
+		return reversed(self._value)
+	
+	def __contains__(self, tag):
+		return tag in self._value
+	
 	def __setitem__(self, index, item):
 		if isinstance(index, int):
 			if not isinstance(item, self.item_cls):
@@ -415,18 +589,18 @@ class TagList(Tag, MutableSequence):
 		
 		elif isinstance(index, slice):
 			items = list(item)
+			# Item checks run at C level through map instead of a generator
 			if self.item_cls is Tag:
 				if items:
 					new_cls = type(items[0])
 					if not issubclass(new_cls, Tag):
 						raise NbtInvalidOperation('Item class must be some Tag')
-					if not all(isinstance(it, new_cls) for it in items):
+					if not all(map(isinstance, items, repeat(new_cls))):
 						raise NbtInvalidOperation('Conflicting tag types in values')
 					self._value[index] = items
 					self.item_cls = new_cls
 			else:
-				this_tag = self.item_cls
-				if not all(isinstance(it, this_tag) for it in items):
+				if not all(map(isinstance, items, repeat(self.item_cls))):
 					raise NbtInvalidOperation('Setting wrong tag type for this list')
 				self._value[index] = items
 		
@@ -448,6 +622,44 @@ class TagList(Tag, MutableSequence):
 			raise NbtInvalidOperation('Inserting wrong tag type for this list')
 		self._value.insert(index, tag)
 	
+	# Direct list methods in place of slower MutableSequence mixins
+	def append(self, tag):
+		if type(tag) is self.item_cls:
+			self._value.append(tag)
+		else:
+			self.insert(len(self._value), tag)
+	
+	def extend(self, tags):
+		# Same exact type match as insert, checked for all items before
+		# any is added
+		items = list(tags)
+		if not items:
+			return
+		item_cls = self.item_cls
+		if item_cls is Tag:
+			item_cls = type(items[0])
+			if not issubclass(item_cls, Tag):
+				raise NbtInvalidOperation('Item class must be some Tag')
+		if not set(map(type, items)) <= {item_cls}:
+			raise NbtInvalidOperation('Inserting wrong tag type for this list')
+		self._value.extend(items)
+		self.item_cls = item_cls
+	
+	def pop(self, index=-1):
+		return self._value.pop(index)
+	
+	def remove(self, tag):
+		self._value.remove(tag)
+	
+	def clear(self):
+		self._value.clear()
+	
+	def index(self, tag, *args):
+		return self._value.index(tag, *args)
+	
+	def count(self, tag):
+		return self._value.count(tag)
+	
 	def __repr__(self):
 		return 'TagList({}, {})'.format(self.item_cls.__name__, self._value)
 
@@ -456,24 +668,12 @@ class TagList(Tag, MutableSequence):
 	
 	@classmethod
 	def read(cls, stream):
-		itemid = stream.read(1)[0]
-		if itemid > MAX_TAG_ID:
-			raise NbtUnpackError('Unknown list item tag id {}'.format(itemid))
-		itemcls = TAG_ID_CLASS_MAPPING[itemid]
-		itemcls_read = itemcls.read
-		
-		size, = _struct_int.unpack(stream.read(4))
-		tags = [itemcls_read(stream) for _ in range(size)]
-		
-		thislist = cls(itemcls)
-		thislist._value = tags
+		thislist = cls(Tag)
+		_read_nested(stream, thislist)
 		return thislist
 
 	def write(self, stream):
-		stream.write(_struct_byte.pack(self.item_cls.tagid))
-		stream.write(_struct_int.pack(len(self._value)))
-		for tag in self._value:
-			tag.write(stream)
+		_write_nested(stream, self)
 
 
 class TagCompound(Tag, MutableMapping):
@@ -492,11 +692,11 @@ class TagCompound(Tag, MutableMapping):
 				or some keys are not strings.
 		"""
 		if mapping is not None:
-			if any(not isinstance(item, Tag) for item in mapping.values()):
+			if not all(map(isinstance, mapping.values(), repeat(Tag))):
 				raise NbtInvalidOperation('Not all mapping elements are Tags')
-			if any(not isinstance(key, str) for key in mapping.keys()):
+			if not all(map(isinstance, mapping.keys(), repeat(str))):
 				raise NbtInvalidOperation('Not all mapping keys are strings')
-			self._value = mapping.copy()
+			self._value = dict(mapping)
 		else:
 			self._value = {}
 	
@@ -521,32 +721,36 @@ class TagCompound(Tag, MutableMapping):
 	
 	def __iter__(self):
 		return iter(self._value)
+	
+	def __contains__(self, key):
+		return key in self._value
+	
+	def get(self, key, default=None):
+		return self._value.get(key, default)
+	
+	def keys(self):
+		return self._value.keys()
+	
+	def values(self):
+		return self._value.values()
+	
+	def items(self):
+		return self._value.items()
+	
+	def pop(self, key, *default):
+		return self._value.pop(key, *default)
+	
+	def clear(self):
+		self._value.clear()
 
 	@classmethod
 	def read(cls, stream):
-		tagdict = {}
-		stream_read = stream.read
-
-		while True:
-			tagid = stream_read(1)[0]
-			if not tagid:
-				break
-			if tagid > MAX_TAG_ID:
-				raise NbtUnpackError('Unknown tag id {} in compound'.format(tagid))
-			name = _compound_read_name(stream)
-			tag = TAG_ID_CLASS_MAPPING[tagid].read(stream)
-			tagdict[name] = tag
-		
 		thistag = cls()
-		thistag._value = tagdict
+		_read_nested(stream, thistag)
 		return thistag
 	
 	def write(self, stream):
-		for name, tag in self._value.items():
-			stream.write(_struct_byte.pack(tag.tagid))
-			_compound_write_name(stream, name)
-			tag.write(stream)
-		stream.write(b'\x00')
+		_write_nested(stream, self)
 
 
 TAG_ID_CLASS_MAPPING = [
@@ -568,6 +772,161 @@ TAG_ID_CLASS_MAPPING = [
 MAX_TAG_ID = len(TAG_ID_CLASS_MAPPING) - 1
 
 
+def _number_reader(tag_cls):
+	# _TagNumber.read specialized for one class, with its Struct bound
+	new = tag_cls.__new__
+	unpack = tag_cls._fmt.unpack
+	size = tag_cls._size
+
+	def read(stream):
+		tag = new(tag_cls)
+		tag._value, = unpack(stream.read(size))
+		return tag
+	
+	return read
+
+
+# Readers of single tags indexed by tag id, for hot read loops.
+# Nested tags are read by _read_nested itself and map to None.
+_TAG_ID_LEAF_READERS = tuple(
+	None if tag_cls in (TagList, TagCompound)
+	else _number_reader(tag_cls) if tag_cls in (TagShort, TagInt, TagLong, TagFloat, TagDouble)
+	else tag_cls.read
+	for tag_cls in TAG_ID_CLASS_MAPPING
+)
+
+# Readers of list items, taking stream and item count
+_TAG_ID_ITEM_READERS = tuple(
+	None if tag_read is None else tag_cls._read_many
+	for tag_cls, tag_read in zip(TAG_ID_CLASS_MAPPING, _TAG_ID_LEAF_READERS)
+)
+
+
+def _new_nested(tagid):
+	if tagid == TagCompound.tagid:
+		tag = TagCompound.__new__(TagCompound)
+		tag._value = {}
+	else:
+		tag = TagList.__new__(TagList)
+		tag.item_cls = Tag
+		tag._value = []
+	return tag
+
+
+def _read_nested(stream, root):
+	# Fills compound and list tags using an explicit stack of unfinished
+	# tags instead of recursive read() calls. Avoids a Python call per
+	# nested tag and isn't limited by interpreter recursion depth.
+	stream_read = stream.read
+	unpack_short = _unpack_short
+	unpack_int = _unpack_int
+	intern = sys.intern
+	readers = _TAG_ID_LEAF_READERS
+	item_readers = _TAG_ID_ITEM_READERS
+	id_classes = TAG_ID_CLASS_MAPPING
+	new_nested = _new_nested
+	compound_id = TagCompound.tagid
+	compound_new = TagCompound.__new__
+	stack = [root]
+
+	while stack:
+		tag = stack.pop()
+
+		# Unfinished list of nested tags, its next item is created only
+		# when reached, so a corrupt count can't allocate ahead of data
+		if type(tag) is tuple:
+			items, itemid, remaining = tag
+			child = new_nested(itemid)
+			items.append(child)
+			if remaining > 1:
+				stack.append((items, itemid, remaining - 1))
+			stack.append(child)
+			continue
+
+		# Read compound entries until its end or a nested tag,
+		# in latter case compound is resumed after the nested one
+		if tag.tagid == compound_id:
+			tagdict = tag._value
+			while True:
+				tagid = stream_read(1)[0]
+				if not tagid:
+					break
+				try:
+					tag_read = readers[tagid]
+				except IndexError:
+					raise NbtUnpackError('Unknown tag id {} in compound'.format(tagid)) from None
+				# Inlined _compound_read_name
+				size, = unpack_short(stream_read(2))
+				name = intern(stream_read(size).decode())
+				if tag_read is None:
+					if tagid == compound_id:
+						child = compound_new(TagCompound)
+						child._value = {}
+					else:
+						child = new_nested(tagid)
+					tagdict[name] = child
+					stack.append(tag)
+					stack.append(child)
+					break
+				tagdict[name] = tag_read(stream)
+			continue
+
+		# Lists of leaf tags are read at once, nested items
+		# are filled one by one in stream order
+		itemid = stream_read(1)[0]
+		try:
+			items_read = item_readers[itemid]
+		except IndexError:
+			raise NbtUnpackError('Unknown list item tag id {}'.format(itemid)) from None
+		size, = unpack_int(stream_read(4))
+		if items_read is None:
+			items = []
+			if size > 0:
+				stack.append((items, itemid, size))
+		else:
+			items = items_read(stream, size)
+		tag.item_cls = id_classes[itemid]
+		tag._value = items
+
+
+def _write_nested(stream, root):
+	# Writes compound and list tags using an explicit stack of child
+	# iterators instead of recursive write() calls, like _read_nested.
+	# List children are paired with None in place of a name.
+	stream_write = stream.write
+	compound_id = TagCompound.tagid
+	list_id = TagList.tagid
+	nested_ids = (list_id, compound_id)
+	no_names = repeat(None)
+	# Items are (iterator over unwritten children, end marker)
+	stack = [(zip(no_names, (root,)), b'')]
+
+	while stack:
+		children, end = stack[-1]
+		for name, child in children:
+			childid = child.tagid
+			if name is not None:
+				raw = name.encode()
+				stream_write(_pack_entry_header(childid, len(raw)))
+				stream_write(raw)
+			if childid == compound_id:
+				stack.append((iter(child._value.items()), b'\x00'))
+				break
+			elif childid == list_id:
+				items = child._value
+				itemid = child.item_cls.tagid
+				stream_write(_pack_list_header(itemid, len(items)))
+				if itemid in nested_ids:
+					stack.append((zip(no_names, items), b''))
+					break
+				child.item_cls._write_many(stream, items)
+			else:
+				child.write(stream)
+		else:
+			stream_write(end)
+			stack.pop()
+
+
 def read_nbt_file(file, *, with_name=False):
 	"""Read file containing NBT data.
 
@@ -586,34 +945,36 @@ def read_nbt_file(file, *, with_name=False):
 	Raises:
 		NbtUnpackError: If unknown tag is found.
 	"""
-	file_handle = None
-	try:
-		if isinstance(file, (str, PurePath)):
-			file_handle = file = open(file, 'rb')
-		
-		gz_magic = file.read(2)
-		file.seek(-2, 1)
-		if gz_magic == b'\x1f\x8b':
-			file = gzip.open(file, 'rb')
-		
-		tagid = file.read(1)[0]
-		if tagid == 0 or tagid > MAX_TAG_ID:
-			raise NbtUnpackError('Invalid base tag')
-		
-		root_name = _compound_read_name(file)
-		root = TAG_ID_CLASS_MAPPING[tagid].read(file)
-		
-		if with_name:
-			return root, root_name
-		else:
-			return root
-	
-	finally:
-		if file_handle is not None:
-			file_handle.close()
-
-
-def write_nbt_file(file, root, *, root_name='', compress=True):
+	# Parse from memory, in-memory reads are much cheaper than
+	# going through gzip or file object layers for every tag.
+	# Seekable streams are probed without reading past the tag if
+	# uncompressed, other ones can't be rewound so are read whole.
+	if isinstance(file, (str, PurePath)):
+		# Unbuffered, the whole file is fetched in one sized read
+		with open(file, 'rb', buffering=0) as file_handle:
+			file = BytesIO(file_handle.read())
+	elif not file.seekable():
+		file = BytesIO(file.read())
+	
+	gz_magic = file.read(2)
+	file.seek(-len(gz_magic), 1)
+	if gz_magic == b'\x1f\x8b':
+		file = BytesIO(gzip.decompress(file.read()))
+	
+	tagid = file.read(1)[0]
+	if tagid == 0 or tagid > MAX_TAG_ID:
+		raise NbtUnpackError('Invalid base tag')
+	
+	root_name = _compound_read_name(file)
+	root = TAG_ID_CLASS_MAPPING[tagid].read(file)
+	
+	if with_name:
+		return root, root_name
+	else:
+		return root
+
+
+def write_nbt_file(file, root, *, root_name='', compress=True, compresslevel=6):
 	"""Write NBT storing file.
 
 	Args:
@@ -621,6 +982,9 @@ def write_nbt_file(file, root, *, root_name='', compress=True):
 		root (Tag): Tag to write.
 		root_name (str): Name of root tag. Default is empty string.
 		compress (bool): Compress the data. Default is True.
+		compresslevel (int): Gzip compression level from 0 to 9. Default is 6,
+			as used by Minecraft itself. Higher levels are much slower for
+			little size gain on typical NBT data.
 	
 	Raises:
 		NbtInvalidOperation: If root is not Tag.
@@ -628,17 +992,24 @@ def write_nbt_file(file, root, *, root_name='', compress=True):
 	if not isinstance(root, Tag):
 		raise NbtInvalidOperation('Root must be a Tag')
 
+	# Serialize to memory first and write everything at once,
+	# many small writes are costly on files and especially gzip streams
+	buffer = BytesIO()
+	buffer.write(_pack_tagid(root.tagid))
+	_compound_write_name(buffer, root_name)
+	root.write(buffer)
+	data = buffer.getvalue()
+
 	file_handle = None
 	try:
 		if isinstance(file, (str, PurePath)):
 			file_handle = file = open(file, 'wb')
 		
 		if compress:
-			file_handle = file = gzip.open(file, 'wb')
-		
-		file.write(_struct_byte.pack(root.tagid))
-		_compound_write_name(file, root_name)
-		root.write(file)
+			with gzip.open(file, 'wb', compresslevel=compresslevel) as gz_file:
+				gz_file.write(data)
+		else:
+			file.write(data)
 
 	finally:
 		if file_handle is not None:
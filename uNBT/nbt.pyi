@@ -106,6 +106,9 @@ class TagFloat(_TagNumber):
 class _TagNumberArray(Tag, MutableSequence[int]):
     def __init__(self, numbers: Optional[Iterable[int]] = None) -> None: ...
 
+    @classmethod
+    def from_array(cls: Type[T], values: Iterable[int]) -> T: ...
+
     @property
     def value(self) -> array[int]: ...
 
@@ -210,4 +213,4 @@ def read_nbt_file(file: _PathOrFileLike, *, with_name: Literal[False] = False) -
 @overload
 def read_nbt_file(file: _PathOrFileLike, *, with_name: Literal[True]) -> Tuple[Tag, str]: ...
 
-def write_nbt_file(file: _PathOrFileLike, root: Tag, *, root_name: str = '', compress: bool = True) -> None: ...
+def write_nbt_file(file: _PathOrFileLike, root: Tag, *, root_name: str = '', compress: bool = True, compresslevel: int = 6) -> None: ...
@@ -4,227 +4,287 @@ import re
 __all__ = ['to_snbt', 'parse_snbt']
 
 
+# Escapes are applied in a single pass, so inserted backslashes aren't escaped again
+_quote_escapes = str.maketrans({'"': '\\"', "'": "\\'", '\\': '\\\\'})
+
+# Quoted string bodies, any character but a newline can follow a backslash.
+# Bodies may span lines, to_snbt writes newlines in strings as is.
+_quoted_string_re = {
+    '"': re.compile(r'"([^\\"]*(?:\\.[^\\"]*)*)"'),
+    "'": re.compile(r"'([^\\']*(?:\\.[^\\']*)*)'"),
+}
+_compound_key_re = re.compile(r'^[0-9a-zA-Z.+_-]+$')
+_unquoted_string_re = re.compile(r'[0-9a-zA-Z.+_-]*')
+_int_array_start_re = re.compile(r'\[([BIL]);')
+_key_colon_re = re.compile(r'\s*:')
+_whitespace_re = re.compile(r'\s*')
+# Floats with a type suffix, or with a decimal point when there's none
+_float_re = re.compile(r'([-+]?(?:[0-9]+[.]?|[0-9]*[.][0-9]+)(?:e[-+]?[0-9]+)?)([fd])$')
+_float_no_suffix_re = re.compile(r'([-+]?(?:[0-9]+[.]|[0-9]*[.][0-9]+)(?:e[-+]?[0-9]+)?)()$')
+_integer_re = re.compile(r'([+-]?(?:0|[1-9][0-9]*))([bsl]?)')
+
+
 def _quote_string(s):
-    return '"{}"'.format(s.replace('"', '\\"').replace("'", "\\'").replace('\\', '\\\\'))
+    return '"{}"'.format(s.translate(_quote_escapes))
 
 
 def _quote_compound_key(s):
-    if re.match(r'^[0-9a-zA-Z.+_-]+$', s):
+    if _compound_key_re.match(s):
         return s
     else:
         return _quote_string(s)
 
 
 def to_snbt(tag, *, sort=False):
+    parts = []
+    _to_snbt_parts(tag, sort, parts)
+    return ''.join(parts)
+
+
+def _format_array(prefix, values, suffix):
+    # Suffix goes in the separator, str() on ints is cheaper than format()
+    if not values:
+        return prefix + ']'
+    return prefix + (suffix + ',').join(map(str, values)) + suffix + ']'
+
+
+# Formatters of non-nested tag values, looked up by exact tag type
+_leaf_formatters = {
+    TagByte: '{}b'.format,
+    TagShort: '{}s'.format,
+    TagInt: str,
+    TagLong: '{}l'.format,
+    TagFloat: '{}f'.format,
+    TagDouble: '{}d'.format,
+    TagByteArray: lambda values: _format_array('[B;', values, 'b'),
+    TagIntArray: lambda values: _format_array('[I;', values, ''),
+    TagLongArray: lambda values: _format_array('[L;', values, 'l'),
+    TagString: _quote_string,
+}
+
+
+def _to_snbt_parts(tag, sort, parts):
+    # Nested tags append to a shared list, so output is joined only once.
+    # Leaf children are formatted in place without a recursive call.
     tt = type(tag)
-    if tt is TagByte:
-        return '{}b'.format(tag.value)
-    if tt is TagShort:
-        return '{}s'.format(tag.value)
-    if tt is TagInt:
-        return '{}'.format(tag.value)
-    if tt is TagLong:
-        return '{}l'.format(tag.value)
-    if tt is TagFloat:
-        return '{}f'.format(tag.value)
-    if tt is TagDouble:
-        return '{}d'.format(tag.value)
-    if tt is TagByteArray:
-        return '[B;{}]'.format(','.join(map('{}b'.format, tag.value)))
-    if tt is TagIntArray:
-        return '[I;{}]'.format(','.join(map('{}'.format, tag.value)))
-    if tt is TagLongArray:
-        return '[L;{}]'.format(','.join(map('{}l'.format, tag.value)))
-    if tt is TagString:
-        return _quote_string(tag.value)
-    if tt is TagList:
-        return '[{}]'.format(','.join(map(to_snbt, tag)))
-    if tt is TagCompound:
+    formatters = _leaf_formatters
+    fmt = formatters.get(tt)
+    if fmt is not None:
+        parts.append(fmt(tag.value))
+    elif tt is TagList:
+        parts.append('[')
+        fmt = formatters.get(tag.item_cls)
+        for i, item in enumerate(tag):
+            if i:
+                parts.append(',')
+            if fmt is not None:
+                parts.append(fmt(item.value))
+            else:
+                _to_snbt_parts(item, False, parts)
+        parts.append(']')
+    elif tt is TagCompound:
         keys = tag.keys()
         if sort:
             keys = sorted(keys)
-        return '{{{}}}'.format(','.join('{}:{}'.format(_quote_compound_key(k), to_snbt(tag[k])) for k in keys))
-    raise ValueError('Unknown tag')
+        parts.append('{')
+        for i, k in enumerate(keys):
+            if i:
+                parts.append(',')
+            parts.append(_quote_compound_key(k))
+            parts.append(':')
+            child = tag[k]
+            fmt = formatters.get(type(child))
+            if fmt is not None:
+                parts.append(fmt(child.value))
+            else:
+                _to_snbt_parts(child, False, parts)
+        parts.append('}')
+    else:
+        raise ValueError('Unknown tag')
 
 
 def parse_snbt(s):
-    unparsed, tag = _parse_rec(s)
-    if not unparsed or unparsed.isspace():
+    pos, tag = _parse_rec(s, 0)
+    if pos == len(s) or s[pos:].isspace():
         return tag
     raise ValueError('Unparsed string remaining')
 
 
-def _parse_rec(s):
-    s = s.lstrip()
-    if not s:
+# Parsing functions take the string and a position in it and return
+# position after the parsed part, so the input is never copied
+def _skip_space(s, pos):
+    return _whitespace_re.match(s, pos).end()
+
+
+def _parse_rec(s, pos):
+    pos = _skip_space(s, pos)
+    if pos == len(s):
         raise ValueError('Nothing to parse')
+    c = s[pos]
     
     # Parse string
-    if s[0] == '"' or s[0] == "'":
-        s, v = _parse_quoted_string(s)
-        return s, TagString(v)
+    if c == '"' or c == "'":
+        pos, v = _parse_quoted_string(s, pos)
+        return pos, TagString(v)
     
     # Parse int arrays
     # Done before list tag to simplify parsing
-    m = re.match(r'\[([BIL]);', s)
+    m = _int_array_start_re.match(s, pos)
     if m:
-        s = s[3:]
+        pos = m.end()
         atype = m.group(1).lower()
 
         values = []
         while True:
-            s = s.lstrip()
-            if not s:
+            pos = _skip_space(s, pos)
+            if pos == len(s):
                 raise ValueError('Unclosed integer array tag')
-            if s[0] == ']':
-                s = s[1:]
+            if s[pos] == ']':
+                pos += 1
                 break
             if values:
-                if s[0] == ',':
-                    s = s[1:].lstrip()
+                if s[pos] == ',':
+                    pos = _skip_space(s, pos + 1)
                 else:
                     raise ValueError('Elements of an array must be comma separated')
             
-            res = _try_parse_integer(s)
+            res = _try_parse_integer(s, pos)
             if not res:
                 raise ValueError('Expected integer tag')
             
-            s, value, suf = res
+            pos, value, suf = res
             if suf != atype:
                 raise ValueError('Wrong integer inside array')
             
             values.append(value)
 
         if atype == 'b':
-            return s, TagByteArray(values)
+            return pos, TagByteArray(values)
         elif atype == 'l':
-            return s, TagLongArray(values)
+            return pos, TagLongArray(values)
         else:
-            return s, TagIntArray(values)
+            return pos, TagIntArray(values)
 
     # Parse list tag
-    if s[0] == '[':
-        s = s[1:]
+    if c == '[':
+        pos += 1
         tags = []
         while True:
-            s = s.lstrip()
-            if not s:
+            pos = _skip_space(s, pos)
+            if pos == len(s):
                 raise ValueError('Unclosed list tag')
-            if s[0] == ']':
-                s = s[1:]
+            if s[pos] == ']':
+                pos += 1
                 break
             if tags:
-                if s[0] == ',':
-                    s = s[1:].lstrip()
+                if s[pos] == ',':
+                    pos = _skip_space(s, pos + 1)
                 else:
-                    raise ValueError('Elements of a list must be comma separated: {}'.format(s))
+                    raise ValueError('Elements of a list must be comma separated: {}'.format(s[pos:]))
             
-            s, tag = _parse_rec(s)
+            pos, tag = _parse_rec(s, pos)
             tags.append(tag)
         
         tag_cls = type(tags[0]) if tags else Tag
-        return s, TagList(tag_cls, tags)
+        return pos, TagList(tag_cls, tags)
 
     # Parse compound tag
-    if s[0] == '{':
-        s = s[1:]
+    if c == '{':
+        pos += 1
         tags = {}
         while True:
-            s = s.lstrip()
-            if not s:
+            pos = _skip_space(s, pos)
+            if pos == len(s):
                 raise ValueError('Unclosed compound tag')
-            if s[0] == '}':
-                s = s[1:]
+            if s[pos] == '}':
+                pos += 1
                 break
             if tags:
-                if s[0] == ',':
-                    s = s[1:].lstrip()
+                if s[pos] == ',':
+                    pos = _skip_space(s, pos + 1)
                 else:
                     raise ValueError('Elements of a compound must be comma separated')
             
-            if s[0] == '"' or s[0] == "'":
-                s, key = _parse_quoted_string(s)
+            if pos < len(s) and (s[pos] == '"' or s[pos] == "'"):
+                pos, key = _parse_quoted_string(s, pos)
             else:
-                s, key = _parse_unquoted_string(s)
+                pos, key = _parse_unquoted_string(s, pos)
 
-            m = re.match(r'\s*:', s)
+            m = _key_colon_re.match(s, pos)
             if not m:
-                raise ValueError('Invalid compound tag key: {}'.format(s))
-            s = s[m.end():]
+                raise ValueError('Invalid compound tag key: {}'.format(s[pos:]))
+            pos = m.end()
 
-            s, value = _parse_rec(s)
+            pos, value = _parse_rec(s, pos)
             
             tags[key] = value
         
-        return s, TagCompound(tags)
+        return pos, TagCompound(tags)
 
     # When no letter is used,
     # it assumes double if there's a decimal point,
     # int if there's no decimal point and the size fits within 32 bits,
     # or string if neither is true.
-    s, chunk = _parse_unquoted_string(s)
+    pos, chunk = _parse_unquoted_string(s, pos)
 
     # Parse floats
-    m = re.match(r'([-+]?(?:[0-9]+[.]?|[0-9]*[.][0-9]+)(?:e[-+]?[0-9]+)?)([fd])$', chunk)
+    m = _float_re.match(chunk)
     if not m:
-        m = re.match(r'([-+]?(?:[0-9]+[.]|[0-9]*[.][0-9]+)(?:e[-+]?[0-9]+)?)()$', chunk)
+        m = _float_no_suffix_re.match(chunk)
     if m:
         value = float(m.group(1))
         vtype = m.group(2).lower()
         if vtype == 'f':
-            return s, TagFloat(value)
+            return pos, TagFloat(value)
         else:
-            return s, TagDouble(value)
+            return pos, TagDouble(value)
     
     # Parse integers
-    m = _try_parse_integer(chunk)
+    m = _try_parse_integer(chunk, 0)
     if m:
         _, value, vtype = m
         if vtype == 'b':
-            return s, TagByte(value)
+            return pos, TagByte(value)
         elif vtype == 's':
-            return s, TagShort(value)
+            return pos, TagShort(value)
         elif vtype == 'l':
-            return s, TagLong(value)
+            return pos, TagLong(value)
         else:
-            return s, TagInt(value)
+            return pos, TagInt(value)
     
     # Special constants
     if chunk == 'true':
-        return s, TagByte(1)
+        return pos, TagByte(1)
     elif chunk == 'false':
-        return s, TagByte(0)
+        return pos, TagByte(0)
 
     # TODO: Game parser default to string on parsing fail, maybe mimic?
     raise ValueError('Failed to parse')
 
 
-def _parse_unquoted_string(s):
-    m = re.match(r'[0-9a-zA-Z.+_-]*', s)
+def _parse_unquoted_string(s, pos):
+    m = _unquoted_string_re.match(s, pos)
     val = m.group()
     if not val:
         raise ValueError('Empty unquoted string')
-    return s[m.end():], val
+    return m.end(), val
 
 
-def _parse_quoted_string(s):
-    quote = s[0]
-    if s[1] == quote:
-        return s[2:], ''
-    m = re.match(r'{0}(.*?[^\\](?:\\\\)*){0}'.format(quote), s)
+def _parse_quoted_string(s, pos):
+    m = _quoted_string_re[s[pos]].match(s, pos)
     if not m:
         raise ValueError('Unclosed string tag')
-    value = m.group(1).replace('\\"', '"').replace("\\'", "'").replace('\\\\', '\\')
-    s = s[m.end():]
-    return s, value
+    value = m.group(1)
+    if '\\' in value:
+        value = value.replace('\\"', '"').replace("\\'", "'").replace('\\\\', '\\')
+    return m.end(), value
 
 
-def _try_parse_integer(s):
-    m = re.match(r'([+-]?(?:0|[1-9][0-9]*))([bsl]?)', s)
+def _try_parse_integer(s, pos):
+    m = _integer_re.match(s, pos)
     if not m:
         return None
     # TODO: Bounds check parsed int. Game parser fails if out of range int is created.
     value = int(m.group(1))
     vtype = m.group(2).lower() or 'i'
-    s = s[m.end():]
-    return s, value, vtype
+    return m.end(), value, vtype
@@ -2,6 +2,7 @@ import os
 from pathlib import Path
 import re
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 __all__ = [
 	'RegionFileInfo',
@@ -13,6 +14,13 @@ __all__ = [
 
 RegionFileInfo = namedtuple('RegionFileInfo', ['path', 'x', 'z'])
 
+_region_name_re = re.compile(r'^r\.(-?\d+)\.(-?\d+)\.mc[ar]$')
+_region_name_fmt_re = {
+	'anvil': re.compile(r'^r\.(-?\d+)\.(-?\d+)\.mca$'),
+	'region': re.compile(r'^r\.(-?\d+)\.(-?\d+)\.mcr$'),
+}
+_dimension_name_re = re.compile(r'^DIM(-?\d+)$')
+
 
 def region_pos_from_path(path):
 	"""Try to extract region coordinates from file name.
@@ -25,7 +33,7 @@ def region_pos_from_path(path):
 			region file name or `None` if name is invalid.
 	"""
 	name = os.path.basename(path)
-	m = re.match(r'^r\.(-?\d+)\.(-?\d+)\.mc[ar]$', name)
+	m = _region_name_re.match(name)
 	if m:
 		return (int(m.group(1)), int(m.group(2)))
 	return None
@@ -46,22 +54,24 @@ def enumerate_region_files(path, fmt='anvil'):
 	Raises:
 		ValueError: If unknown `fmt` is passed in.
 	"""
-	if fmt == 'anvil':
-		ext = '.mca'
-	elif fmt == 'region':
-		ext = '.mcr'
-	else:
+	name_re = _region_name_fmt_re.get(fmt)
+	if name_re is None:
 		raise ValueError('Unknown format')
 	
+	# scandir entries cache file type, avoiding a stat call per entry
+	base = Path(path)
 	files = []
-	for fullpath in Path(path).iterdir():
-		rxz = region_pos_from_path(fullpath)
-		if rxz and fullpath.suffix == ext and fullpath.is_file():
-			files.append(RegionFileInfo(path=str(fullpath), x=rxz[0], z=rxz[1]))
+	with os.scandir(path) as entries:
+		for entry in entries:
+			m = name_re.match(entry.name)
+			if m and entry.is_file():
+				files.append(RegionFileInfo(
+					path=str(base / entry.name), x=int(m.group(1)), z=int(m.group(2))
+				))
 	return files
 
 
-def enumerate_world(path, fmt='anvil'):
+def enumerate_world(path, fmt='anvil', *, parallel=False):
 	"""Enumerate dimensions in provieded world directory.
 
 	Args:
@@ -69,6 +79,9 @@ def enumerate_world(path, fmt='anvil'):
 		fmt (str): World save type. Supports:
 			* anvil (default)
 			* region
+		parallel (bool): Scan dimension region directories in
+			a thread pool. Helps on slow or cold storage with many
+			dimensions. Default is False.
 
 	Returns:
 		dict: Mapping from integer dimension ids to lists of 
@@ -77,19 +90,31 @@ def enumerate_world(path, fmt='anvil'):
 	Raises:
 		ValueError: If unknown `fmt` is passed in.
 	"""
-	dims = {}
-	for fullpath in Path(path).iterdir():
-		if not fullpath.is_dir():
-			continue
-		
-		if fullpath.name == 'region':
-			dims[0] = enumerate_region_files(fullpath, fmt)
-			continue
-		
-		m = re.match(r'^DIM(-?\d+)$', fullpath.name)
-		if m:
-			regpath = fullpath / 'region'
-			if regpath.is_dir():
-				dims[int(m.group(1))] = enumerate_region_files(regpath, fmt)
+	base = Path(path)
+	dim_paths = []
+	with os.scandir(path) as entries:
+		for entry in entries:
+			if not entry.is_dir():
+				continue
+			
+			if entry.name == 'region':
+				dim_paths.append((0, base / entry.name))
+				continue
+			
+			m = _dimension_name_re.match(entry.name)
+			if m:
+				regpath = base / entry.name / 'region'
+				if regpath.is_dir():
+					dim_paths.append((int(m.group(1)), regpath))
+	
+	def scan(dim_path):
+		return enumerate_region_files(dim_path[1], fmt)
+	
+	if parallel and len(dim_paths) > 1:
+		# Directory listing releases the GIL, so threads overlap IO waits
+		with ThreadPoolExecutor(max_workers=min(8, len(dim_paths))) as executor:
+			region_lists = list(executor.map(scan, dim_paths))
+	else:
+		region_lists = list(map(scan, dim_paths))
 	
-	return dims
+	return {dim: regions for (dim, _), regions in zip(dim_paths, region_lists)}
@@ -12,4 +12,4 @@ def region_pos_from_path(path: str) -> Optional[Tuple[int, int]]: ...
 
 def enumerate_region_files(path: str, fmt: RegionFormat = 'anvil') -> List[RegionFileInfo]: ...
 
-def enumerate_world(path: str, fmt: RegionFormat = 'anvil') -> Dict[int, List[RegionFileInfo]]: ...
+def enumerate_world(path: str, fmt: RegionFormat = 'anvil', *, parallel: bool = False) -> Dict[int, List[RegionFileInfo]]: ...
@@ -1,9 +1,13 @@
 # Note: nothing in this API is final
+import os
+import mmap
 from pathlib import Path
 import zlib
 import struct
 from io import BytesIO
-from .nbt import read_nbt_file
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from .nbt import read_nbt_file, write_nbt_file
 from .util import region_pos_from_path
 
 __all__ = [
@@ -12,21 +16,42 @@ __all__ = [
 ]
 
 
+# Chunk location entries of a region file header, in z-major order
+_struct_locations = struct.Struct('>1024I')
+# Chunk body header, length in bytes and compression type
+_struct_chunk_header = struct.Struct('>IB')
+
+
+def _decode_chunk(data):
+    # Module level so it can be sent to worker processes
+    # Root name is kept so chunk can be written back unchanged
+    return read_nbt_file(BytesIO(zlib.decompress(data)), with_name=True)
+
+
 class Chunk:
     """Class holding chunk's NBT data."""
 
-    def __init__(self, chunk_nbt):
+    __slots__ = ('_chunk_nbt', '_name')
+
+    def __init__(self, chunk_nbt, name=''):
         """Create new integer number tag.
 
 		Args:
 			chunk_nbt (TagCompound): Chunk's nbt data.
+			name (str): Name of chunk's root tag. Default is empty string.
 		"""
         self._chunk_nbt = chunk_nbt
+        self._name = name
     
     @property
     def nbt(self):
         """TagComound: Get chunk's NBT data"""
         return self._chunk_nbt
+    
+    @property
+    def name(self):
+        """str: Get name of chunk's root tag"""
+        return self._name
 
 
 class Region:
@@ -35,68 +60,110 @@ class Region:
     CHUNKS_WIDTH = 32
     """int: Width of region in chunks."""
 
-    def __init__(self):
-        """Create empty region."""
-        # Non-generated chunks are stored as None
-        # When first read chunks are stored as compressed bytes
+    def __init__(self, cache_size=None):
+        """Create empty region.
+
+        Args:
+            cache_size (int, optional): Maximum number of parsed chunks kept.
+                Least recently used chunks beyond that are dropped and parsed
+                again from compressed bytes when requested. Default is None,
+                all parsed chunks are kept.
+
+        Warning:
+            Changes made to a chunk are lost when it's dropped from a bounded
+            cache, next `get_chunk` returns it as stored in the region file.
+        """
+        # Chunks are kept in flat lists indexed by z * CHUNKS_WIDTH + x
+        # When first read chunks are stored as compressed bytes in _data
         # Getting a chunk automatically decompresses bytes and parses NBT
-        # Parsed chunks are stored as Chunk
-        self._chunks = [[None] * self.CHUNKS_WIDTH for _ in range(self.CHUNKS_WIDTH)]
+        # Parsed chunks are stored as Chunk in _parsed, or in the cache if it's bounded
+        # Non-generated chunks are None in both
+        chunk_count = self.CHUNKS_WIDTH * self.CHUNKS_WIDTH
+        self._data = [None] * chunk_count
+        self._parsed = [None] * chunk_count
+        self._cache_size = cache_size
+        self._cache = OrderedDict() if cache_size is not None else None
     
     @classmethod
-    def from_file(cls, path):
+    def from_file(cls, path, cache_size=None):
         """Load region data from file.
 
         Args:
             path (str): Path to regon file.
+            cache_size (int, optional): Maximum number of parsed chunks kept,
+                see `Region`. Default is None, no limit.
         
         Returns:
             Region: Loaded region file.
         """
-        region = cls()
+        region = cls(cache_size)
         rxz = region_pos_from_path(path)
         
         with open(path, 'rb') as rflie:
+            # Chunk bodies start after location and timestamp tables,
+            # smaller files can't contain any chunks
+            if os.fstat(rflie.fileno()).st_size <= 2 * 4096:
+                return region # empty or invalid file
+            
+            # Whole location table is unpacked at once
+            header = rflie.read(_struct_locations.size)
+            
             chunk_locations = []
-            for z in range(cls.CHUNKS_WIDTH):
-                for x in range(cls.CHUNKS_WIDTH):
-                    # big endian, [0..2] offset in 4KiB sectors, [3] length in 4KiB sectors rounded up
-                    try:
-                        loc_info, = struct.unpack('>I', rflie.read(4))
-                    except struct.error:
-                        return region # empty or invalid file
+            for i, loc_info in enumerate(_struct_locations.unpack(header)):
+                # big endian, [0..2] offset in 4KiB sectors, [3] length in 4KiB sectors rounded up
+                if loc_info == 0:
+                    continue # chunk not present
+                
+                chunk_locations.append(((loc_info >> 8) * 4096, i))
+            
+            if not chunk_locations:
+                return region # all chunks absent, nothing to map
+            
+            # Chunk bodies are sliced out of a read-only mapping of the file,
+            # one copy from page cache per chunk and no read calls
+            with mmap.mmap(rflie.fileno(), 0, access=mmap.ACCESS_READ) as rmap:
+                # Chunks are read in offset order, let the kernel read ahead further
+                # and start fetching the whole file before the first body is touched
+                if hasattr(rmap, 'madvise'):
+                    rmap.madvise(mmap.MADV_SEQUENTIAL)
+                    if hasattr(mmap, 'MADV_WILLNEED'):
+                        rmap.madvise(mmap.MADV_WILLNEED)
+
+                width = cls.CHUNKS_WIDTH
+                chunk_data = region._data
+                unpack_chunk_header = _struct_chunk_header.unpack_from
+                for offset, i in sorted(chunk_locations):
+                    length, compression = unpack_chunk_header(rmap, offset)
                     
-                    if loc_info == 0:
-                        continue # chunk not present
+                    # 1 - Gzip (unused), 2 - Zlib, 3 - uncompressed
+                    # If high bit is set - chunk is in external file c.[x].[z].mcc
+                    if (compression & 127) != 2:
+                        # raise NotImplementedError('Unsupported compression format {}'.format(compression))
+                        print('Warning: skipping chunk with unsupported compression')
+                        continue
                     
-                    sector_count = loc_info & 255
-                    chunk_locations.append(((loc_info >> 8) * 4096, x, z))
-            
-            # Sort by offset for read performance
-            for offset, x, z in sorted(chunk_locations):
-                rflie.seek(offset)
-                length, compression = struct.unpack('>IB', rflie.read(5))
-                
-                # 1 - Gzip (unused), 2 - Zlib, 3 - uncompressed
-                # If high bit is set - chunk is in external file c.[x].[z].mcc
-                if (compression & 127) != 2:
-                    # raise NotImplementedError('Unsupported compression format {}'.format(compression))
-                    print('Warning: skipping chunk with unsupported compression')
-                    continue
-                
-                if compression & 128:
-                    if rxz is None:
-                        # TODO: chunks have their position duplicated in NBT, read from there.
-                        raise ValueError('Found external chunk, but no region position available')
-                    cx, cz = x + rxz[0] * 32, z + rxz[1] * 32
-                    cname = 'c.{}.{}.mcc'.format(cx, cz)
-                    data = (Path(path).parent / cname).read_bytes()
-                else:
-                    data = rflie.read(length)
-                region._chunks[z][x] = data
+                    if compression & 128:
+                        if rxz is None:
+                            # TODO: chunks have their position duplicated in NBT, read from there.
+                            raise ValueError('Found external chunk, but no region position available')
+                        z, x = divmod(i, width)
+                        cx, cz = x + rxz[0] * 32, z + rxz[1] * 32
+                        cname = 'c.{}.{}.mcc'.format(cx, cz)
+                        data = (Path(path).parent / cname).read_bytes()
+                    else:
+                        data = rmap[offset + 5:offset + 5 + length]
+                    chunk_data[i] = data
 
         return region
 
+    def _chunk_index(self, x, z):
+        # Flat index of chunk, coordinates are checked separately
+        # so they can't wrap into another row
+        width = self.CHUNKS_WIDTH
+        if not (0 <= x < width and 0 <= z < width):
+            raise IndexError('Chunk coordinates ({}, {}) are outside of region'.format(x, z))
+        return z * width + x
+
     def get_chunk(self, x, z):
         """Get chunk at in-region coordinates.
 
@@ -106,14 +173,116 @@ class Region:
         
         Returns:
             Chunk, optional: Requested chunk.
+        
+        Raises:
+            IndexError: If coordinates are outside of region.
         """
-        data = self._chunks[z][x]
-        if type(data) is not bytes:
-            return data
-        data = zlib.decompress(data)
-        chunk_nbt = Chunk(read_nbt_file(BytesIO(data)))
-        self._chunks[z][x] = chunk_nbt
+        i = self._chunk_index(x, z)
+        chunk_nbt = self._parsed[i]
+        if chunk_nbt is not None:
+            return chunk_nbt
+        data = self._data[i]
+        if data is None:
+            return None
+        cache = self._cache
+        if cache is not None:
+            chunk_nbt = cache.get(i)
+            if chunk_nbt is not None:
+                cache.move_to_end(i)
+                return chunk_nbt
+        chunk_nbt = Chunk(*_decode_chunk(data))
+        self._store_chunk(i, chunk_nbt)
         return chunk_nbt
+
+    def has_chunk(self, x, z):
+        """Check if chunk is present without decompressing it.
+
+        Args:
+            x (int): X coordinate inside region.
+            z (int): Z coordinate inside region.
+        
+        Returns:
+            bool: True if chunk is present.
+        
+        Raises:
+            IndexError: If coordinates are outside of region.
+        """
+        i = self._chunk_index(x, z)
+        return self._data[i] is not None or self._parsed[i] is not None
+
+    def get_chunk_data(self, x, z):
+        """Get uncompressed NBT bytes of chunk at in-region coordinates.
+
+        Chunk is not parsed, so this is much cheaper than `get_chunk`
+        for tools that only pass chunk data along or scan it as bytes.
+        Chunks already parsed and still held by the region are serialized
+        back, so changes made to them are included.
+
+        Args:
+            x (int): X coordinate inside region.
+            z (int): Z coordinate inside region.
+        
+        Returns:
+            bytes, optional: Uncompressed NBT data of requested chunk.
+        
+        Raises:
+            IndexError: If coordinates are outside of region.
+        """
+        i = self._chunk_index(x, z)
+        chunk = self._parsed[i]
+        if chunk is None and self._cache is not None:
+            chunk = self._cache.get(i)
+        if chunk is None:
+            data = self._data[i]
+            return zlib.decompress(data) if data is not None else None
+        buffer = BytesIO()
+        write_nbt_file(buffer, chunk.nbt, root_name=chunk.name, compress=False)
+        return buffer.getvalue()
+
+    def _store_chunk(self, i, chunk_nbt):
+        cache = self._cache
+        if cache is None:
+            self._parsed[i] = chunk_nbt
+            self._data[i] = None
+            return
+        # Compressed bytes stay in place so dropped chunks can be parsed again
+        cache[i] = chunk_nbt
+        if len(cache) > self._cache_size:
+            cache.popitem(last=False)
+
+    def decompress_all(self, max_workers=None):
+        """Decompress and parse all chunks not read yet, using worker processes.
+
+        Note:
+            Parsed chunks are pickled back to this process, which costs
+            roughly half as much as parsing, so speedup is limited to about 2x.
+            With a single worker or few unread chunks everything is
+            processed in this process, starting workers wouldn't pay off.
+            With bounded `cache_size` at most that many unread chunks
+            are parsed, the rest would only be dropped from the cache.
+
+        Args:
+            max_workers (int, optional): Number of worker processes.
+                Default is number of CPUs.
+        """
+        cache = self._cache or ()
+        pending = [
+            (i, data)
+            for i, data in enumerate(self._data)
+            if data is not None and i not in cache
+        ]
+        if self._cache_size is not None:
+            pending = pending[:self._cache_size]
+        workers = max_workers or os.cpu_count() or 1
+        if workers < 2 or len(pending) < 64:
+            for i, data in pending:
+                self._store_chunk(i, Chunk(*_decode_chunk(data)))
+            return
+        
+        with ProcessPoolExecutor(workers) as executor:
+            tags = executor.map(_decode_chunk, [data for _, data in pending], chunksize=16)
+            for (i, _), (chunk_nbt, name) in zip(pending, tags):
+                self._store_chunk(i, Chunk(chunk_nbt, name))
     
     def iter_nonempty(self):
         """Iterate over all chunks present in region.
@@ -121,8 +290,10 @@ class Region:
         Yields:
             Chunk: Next nonempty chunk.
         """
-        for z in range(self.CHUNKS_WIDTH):
-            for x in range(self.CHUNKS_WIDTH):
-                chunk = self.get_chunk(x, z)
-                if chunk:
-                    yield chunk
+        width = self.CHUNKS_WIDTH
+        for i, (data, chunk) in enumerate(zip(self._data, self._parsed)):
+            if chunk is not None:
+                yield chunk
+            elif data is not None:
+                z, x = divmod(i, width)
+                yield self.get_chunk(x, z)
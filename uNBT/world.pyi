@@ -2,20 +2,29 @@ from typing import Iterator, Optional
 from uNBT.nbt import TagCompound
 
 class Chunk:
-    def __init__(self, chunk_nbt: TagCompound) -> None: ...
+    def __init__(self, chunk_nbt: TagCompound, name: str = '') -> None: ...
     
     @property
     def nbt(self) -> TagCompound: ...
+    
+    @property
+    def name(self) -> str: ...
 
 
 class Region:
     CHUNKS_WIDTH: int = ...
     
-    def __init__(self) -> None: ...
+    def __init__(self, cache_size: Optional[int] = None) -> None: ...
     
     @classmethod
-    def from_file(cls, path: str) -> Region: ...
+    def from_file(cls, path: str, cache_size: Optional[int] = None) -> Region: ...
     
     def get_chunk(self, x: int, z: int) -> Optional[Chunk]: ...
     
+    def has_chunk(self, x: int, z: int) -> bool: ...
+    
+    def get_chunk_data(self, x: int, z: int) -> Optional[bytes]: ...
+    
+    def decompress_all(self, max_workers: Optional[int] = None) -> None: ...
+    
     def iter_nonempty(self) -> Iterator[Chunk]: ...